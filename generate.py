@@ -5,22 +5,64 @@ Generates an HTML page with a GitHub-style contribution graph from JSON data.
 """
 
 import os
+import sys
+import html
 import json
-from datetime import datetime, timedelta
-from collections import Counter
+from datetime import datetime
 from dotenv import load_dotenv
 
+# orjson parses large data files much faster; fall back to json if missing
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+
+# Counts at or above these values already hit the maximum opacity
+SINGLE_OPACITY_MAX_COUNT = 3
+MULTI_OPACITY_MAX_COUNT = 4
+
+# Opacity strings by count, starting at a count of 1
+SINGLE_OPACITIES = tuple(
+    str(min(0.4 + (count * 0.2), 1.0)) for count in range(1, SINGLE_OPACITY_MAX_COUNT + 1)
+)
+MULTI_OPACITIES = tuple(
+    str(min(0.4 + (count * 0.15), 0.9)) for count in range(1, MULTI_OPACITY_MAX_COUNT + 1)
+)
+
+# Per-color styles and stripe colors by count, filled on first use
+_color_tables = {}
+
+# Style of a day without events (GitHub gray)
+EMPTY_STYLE = 'background-color: #ebedf0;'
+
+# Shared copies of every style string built so far
+_style_intern = {}
+
+# Reused JSON encoder for the per-day data-events attribute
+_json_encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=True).encode
+
+# Characters to escape inside a single-quoted HTML attribute
+_ATTR_ESCAPES = str.maketrans({'&': '&amp;', "'": '&#x27;'})
+
+# Days per month in a non-leap year
+MONTH_LENGTHS = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+# Zero-padded day-of-month strings: '01' .. '31'
+DAY_SUFFIXES = tuple(f'{day:02d}' for day in range(1, 32))
+
 
 def load_config():
     """Load configuration from .env file."""
     load_dotenv()
+    getenv = os.environ.get
     
     config = {
-        'title': os.getenv('TITLE', 'Contribution Graph'),
-        'description': os.getenv('DESCRIPTION', ''),
-        'json_file_path': os.getenv('JSON_FILE_PATH', 'data.json'),
-        'year': int(os.getenv('YEAR', datetime.now().year)),
-        'start_day': os.getenv('START_DAY', 'monday').lower()
+        'title': getenv('TITLE', 'Contribution Graph'),
+        'description': getenv('DESCRIPTION', ''),
+        'json_file_path': getenv('JSON_FILE_PATH', 'data.json'),
+        'year': int(getenv('YEAR', datetime.now().year)),
+        'start_day': getenv('START_DAY', 'monday').lower()
     }
     
     if config['start_day'] not in ['monday', 'sunday']:
@@ -31,22 +73,43 @@ def load_config():
 
 def load_data(json_file_path):
     """Load events and dates from JSON file."""
-    with open(json_file_path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    with open(json_file_path, 'rb') as f:
+        data = _json_loads(f.read())
     
     # Create event lookup dictionary
-    events_lookup = {event['code']: event for event in data['events']}
+    events_lookup = {intern_code(event['code']): event for event in data['events']}
     
-    # Parse dates and group by date
-    dates_data = {}
-    for entry in data['dates']:
-        date = entry['date']
-        codes = entry['codes']
-        dates_data[date] = codes
+    # Parse dates and group by date; codes are interned so the many repeats
+    # share one string object and compare by identity
+    dates_data = {
+        entry['date']: [intern_code(code) for code in entry['codes']]
+        for entry in data['dates']
+    }
     
     return events_lookup, dates_data
 
 
+def intern_code(code):
+    """Intern string event codes; other values (e.g. numbers) pass through."""
+    return sys.intern(code) if isinstance(code, str) else code
+
+
+def color_tables(color):
+    """
+    Get the styles for a hex color, computed on first use.
+    Returns a tuple of (single_event_styles, stripe_colors), indexed by count - 1
+    """
+    tables = _color_tables.get(color)
+    if tables is None:
+        r, g, b = hex_to_rgb(color)
+        rgba_prefix = f'rgba({r}, {g}, {b}, '
+        tables = _color_tables[color] = (
+            tuple('background-color: ' + rgba_prefix + opacity + ');' for opacity in SINGLE_OPACITIES),
+            tuple(rgba_prefix + opacity + ')' for opacity in MULTI_OPACITIES)
+        )
+    return tables
+
+
 def hex_to_rgb(hex_color):
     """Convert hex color to RGB tuple."""
     hex_color = hex_color.lstrip('#')
@@ -65,100 +128,125 @@ def calculate_day_style(codes, events_lookup):
     """
     if not codes:
         # Empty day - GitHub gray
-        return 'background-color: #ebedf0;', {}
+        return EMPTY_STYLE, {}
+    
+    # Single event type (possibly repeated) - use opacity based on count
+    first_code = codes[0]
+    if all(code is first_code or code == first_code for code in codes):
+        event = events_lookup[first_code]
+        count = len(codes)
+        
+        # Opacity grows with count
+        single_styles, _ = color_tables(event['color'])
+        style = single_styles[min(count, SINGLE_OPACITY_MAX_COUNT) - 1]
+        
+        return style, {event['name']: count}
     
     # Count occurrences of each event code
-    code_counts = Counter(codes)
+    code_counts = {}
+    for code in codes:
+        code_counts[code] = code_counts.get(code, 0) + 1
     unique_events = list(code_counts.keys())
     
     # Get event names for tooltip
     event_counts = {events_lookup[code]['name']: count for code, count in code_counts.items()}
     
-    if len(unique_events) == 1:
-        # Single event type - use opacity based on count
-        event_code = unique_events[0]
+    # Multiple event types - create diagonal stripes
+    total_count = sum(code_counts.values())
+    
+    # Calculate stripe percentages
+    gradients = []
+    cumulative_percent = 0
+    
+    for event_code in unique_events:
         event = events_lookup[event_code]
         count = code_counts[event_code]
+        percent = (count / total_count) * 100
         
-        # Calculate opacity: 0.4 for 1, 0.6 for 2, 0.8 for 3, 1.0 for 4+
-        opacity = min(0.4 + (count * 0.2), 1.0)
+        # Opacity based on count
+        _, stripe_colors = color_tables(event['color'])
+        color_rgba = stripe_colors[min(count, MULTI_OPACITY_MAX_COUNT) - 1]
         
-        color = event['color']
-        r, g, b = hex_to_rgb(color)
-        style = f'background-color: rgba({r}, {g}, {b}, {opacity});'
+        gradients.append({
+            'color': color_rgba,
+            'start': cumulative_percent,
+            'end': cumulative_percent + percent
+        })
         
-        return style, event_counts
+        cumulative_percent += percent
     
-    else:
-        # Multiple event types - create diagonal stripes
-        total_count = sum(code_counts.values())
-        
-        # Calculate stripe percentages
-        gradients = []
-        cumulative_percent = 0
-        
-        for event_code in unique_events:
-            event = events_lookup[event_code]
-            count = code_counts[event_code]
-            percent = (count / total_count) * 100
-            
-            color = event['color']
-            r, g, b = hex_to_rgb(color)
-            
-            # Calculate opacity based on average count
-            avg_opacity = min(0.4 + (count * 0.15), 0.9)
-            
-            color_rgba = f'rgba({r}, {g}, {b}, {avg_opacity})'
-            
-            gradients.append({
-                'color': color_rgba,
-                'start': cumulative_percent,
-                'end': cumulative_percent + percent
-            })
-            
-            cumulative_percent += percent
-        
-        # Build repeating diagonal gradient
-        gradient_stops = []
-        stripe_size = 10  # pixels for stripe width
-        
-        for g in gradients:
-            gradient_stops.append(f"{g['color']} {g['start']}%")
-            gradient_stops.append(f"{g['color']} {g['end']}%")
-        
-        gradient_str = ', '.join(gradient_stops)
-        style = f'background: repeating-linear-gradient(45deg, {gradient_str});'
-        
-        return style, event_counts
+    # Build repeating diagonal gradient
+    gradient_stops = []
+    stripe_size = 10  # pixels for stripe width
+    
+    for g in gradients:
+        gradient_stops.append(f"{g['color']} {g['start']}%")
+        gradient_stops.append(f"{g['color']} {g['end']}%")
+    
+    gradient_str = ', '.join(gradient_stops)
+    style = f'background: repeating-linear-gradient(45deg, {gradient_str});'
+    
+    return _style_intern.setdefault(style, style), event_counts
 
 
 def generate_calendar_grid(year, start_day, dates_data, events_lookup):
-    """Generate the calendar grid data for the entire year."""
+    """
+    Generate the calendar grid data for the entire year.
+    Returns a tuple of (grid, style_classes) where style_classes maps each
+    day style used in the grid to its CSS class name
+    """
     # Determine first day of year
     first_day = datetime(year, 1, 1)
     
     # Determine if leap year
     is_leap = (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0)
-    days_in_year = 366 if is_leap else 365
     
-    # Generate all days in the year
+    month_lengths = list(MONTH_LENGTHS)
+    if is_leap:
+        month_lengths[1] += 1
+    
+    # Generate all days in the year as empty days, building date strings
+    # without strftime and remembering each date's position
+    empty_style, empty_counts = calculate_day_style([], events_lookup)
+    
+    # Every distinct style gets a class so cells don't repeat it inline
+    style_classes = {empty_style: 'day-p0'}
+    empty_class = style_classes[empty_style]
+    
     days = []
-    for day_offset in range(days_in_year):
-        current_date = first_day + timedelta(days=day_offset)
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        # Get codes for this date
-        codes = dates_data.get(date_str, [])
+    day_index = {}
+    for month, month_length in enumerate(month_lengths, start=1):
+        month_prefix = f'{year}-{month:02d}-'
+        for day_suffix in DAY_SUFFIXES[:month_length]:
+            date_str = month_prefix + day_suffix
+            day_index[date_str] = len(days)
+            days.append({
+                'date': date_str,
+                'style_class': empty_class,
+                'event_counts': empty_counts
+            })
+    
+    # Days with the same codes share a style, so compute each pattern once
+    style_cache = {}
+    
+    # Fill in only the days that have activity in this year
+    for date_str, codes in dates_data.items():
+        slot = day_index.get(date_str)
+        if slot is None:
+            continue
         
         # Calculate style and event counts
-        style, event_counts = calculate_day_style(codes, events_lookup)
+        key = tuple(codes)
+        cached = style_cache.get(key)
+        if cached is None:
+            style, event_counts = calculate_day_style(codes, events_lookup)
+            style_class = style_classes.get(style)
+            if style_class is None:
+                style_class = style_classes[style] = f'day-p{len(style_classes)}'
+            cached = style_cache[key] = (style_class, event_counts)
         
-        days.append({
-            'date': date_str,
-            'date_obj': current_date,
-            'style': style,
-            'event_counts': event_counts
-        })
+        day_data = days[slot]
+        day_data['style_class'], day_data['event_counts'] = cached
     
     # Organize into weeks
     # Determine the day of week for Jan 1
@@ -172,80 +260,38 @@ def generate_calendar_grid(year, start_day, dates_data, events_lookup):
     # Add empty cells at the beginning if needed
     grid = [None] * jan_1_weekday + days
     
-    return grid
+    return grid, style_classes
 
 
-def generate_html(config, grid, events_lookup):
-    """Generate the HTML content."""
-    title = config['title']
-    description = config['description']
+def generate_html(config, grid, style_classes, events_lookup, out):
+    """Generate the HTML content, writing it to the file-like object out."""
+    title = html.escape(config['title'])
+    description = html.escape(config['description'])
     year = config['year']
+    write = out.write
     
     # Calculate number of weeks (rounded up)
     num_cells = len(grid)
     num_weeks = (num_cells + 6) // 7
     
-    # Calculate total event counts
-    total_event_counts = {}
-    for day_data in grid:
-        if day_data is not None:
-            for event_name, count in day_data['event_counts'].items():
-                if event_name not in total_event_counts:
-                    total_event_counts[event_name] = 0
-                total_event_counts[event_name] += count
-    
-    # Build the grid HTML
-    grid_html = []
-    
-    # Create cells
-    for idx, day_data in enumerate(grid):
-        if day_data is None:
-            # Empty cell
-            grid_html.append('<div class="day day-empty"></div>')
-        else:
-            date = day_data['date']
-            style = day_data['style']
-            event_counts = day_data['event_counts']
-            
-            # Format event counts for data attribute
-            events_str = json.dumps(event_counts) if event_counts else '{}'
-            
-            grid_html.append(
-                f'<div class="day" data-date="{date}" data-events=\'{events_str}\' style="{style}"></div>'
-            )
-    
-    grid_cells = '\n            '.join(grid_html)
-    
-    # Build event statistics HTML
-    stats_html = []
-    
-    # Find event colors by matching names with codes
-    event_colors = {}
-    for event_code, event_data in events_lookup.items():
-        event_colors[event_data['name']] = event_data['color']
-    
-    # Sort by count descending
-    sorted_events = sorted(total_event_counts.items(), key=lambda x: x[1], reverse=True)
-    
-    for event_name, count in sorted_events:
-        color = event_colors.get(event_name, '#666')
-        stats_html.append(
-            f'<div class="stat-item">'
-            f'<span class="stat-color" style="background-color: {color};"></span>'
-            f'<span class="stat-name">{event_name}</span>'
-            f'<span class="stat-count">{count}</span>'
-            f'</div>'
-        )
-    
-    stats_items = '\n                '.join(stats_html) if stats_html else '<p class="no-stats">No activity</p>'
-    
-    html_content = f"""<!DOCTYPE html>
+    write(f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{title}</title>
     <link rel="stylesheet" href="styles.css">
+    <style>
+""")
+    
+    for style, style_class in style_classes.items():
+        write('        .')
+        write(style_class)
+        write(' { ')
+        write(style)
+        write(' }\n')
+    
+    write(f"""    </style>
 </head>
 <body>
     <div class="container">
@@ -256,14 +302,62 @@ def generate_html(config, grid, events_lookup):
         
         <div class="graph-wrapper">
             <div class="graph">
-                {grid_cells}
+                """)
+    
+    # Create cells, totalling event counts in the same pass
+    total_event_counts = {}
+    for idx, day_data in enumerate(grid):
+        if idx:
+            write('\n            ')
+        if day_data is None:
+            # Empty cell
+            write('<div class="day day-empty"></div>')
+        else:
+            event_counts = day_data['event_counts']
+            for event_name, count in event_counts.items():
+                total_event_counts[event_name] = total_event_counts.get(event_name, 0) + count
+            
+            # Format event counts for data attribute
+            events_str = _json_encode(event_counts).translate(_ATTR_ESCAPES) if event_counts else '{}'
+            
+            write('<div class="day ')
+            write(day_data['style_class'])
+            write('" data-date="')
+            write(day_data['date'])
+            write('" data-events=\'')
+            write(events_str)
+            write('\'></div>')
+    
+    write("""
             </div>
         </div>
         
         <div class="statistics">
             <h2 class="stats-title">Event Statistics</h2>
             <div class="stats-list">
-                {stats_items}
+                """)
+    
+    # Find event colors by matching names with codes
+    event_colors = {event_data['name']: event_data['color'] for event_data in events_lookup.values()}
+    
+    # Sort by count descending
+    sorted_events = sorted(total_event_counts.items(), key=lambda x: x[1], reverse=True)
+    
+    for idx, (event_name, count) in enumerate(sorted_events):
+        if idx:
+            write('\n                ')
+        write('<div class="stat-item"><span class="stat-color" style="background-color: ')
+        write(html.escape(str(event_colors.get(event_name, '#666'))))
+        write(';"></span><span class="stat-name">')
+        write(html.escape(str(event_name)))
+        write('</span><span class="stat-count">')
+        write(str(count))
+        write('</span></div>')
+    
+    if not sorted_events:
+        write('<p class="no-stats">No activity</p>')
+    
+    write(f"""
             </div>
         </div>
         
@@ -276,9 +370,7 @@ def generate_html(config, grid, events_lookup):
     
     <script src="scripts.js"></script>
 </body>
-</html>"""
-    
-    return html_content
+</html>""")
 
 
 def main():
@@ -298,7 +390,7 @@ def main():
         print(f"   Dates with activity: {len(dates_data)}")
         
         # Generate calendar grid
-        grid = generate_calendar_grid(
+        grid, style_classes = generate_calendar_grid(
             config['year'],
             config['start_day'],
             dates_data,
@@ -306,13 +398,17 @@ def main():
         )
         print(f"📅 Calendar grid generated ({len(grid)} cells)")
         
-        # Generate HTML
-        html_content = generate_html(config, grid, events_lookup)
-        
-        # Write to file
+        # Generate HTML into a temp file, then swap it in so a failed run
+        # leaves the previous page untouched
         output_file = 'index.html'
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        temp_file = output_file + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                generate_html(config, grid, style_classes, events_lookup, f)
+            os.replace(temp_file, output_file)
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
         
         print(f"✅ HTML generated successfully: {output_file}")
         